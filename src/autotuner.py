@@ -0,0 +1,255 @@
+import os
+import time
+import argparse
+import itertools
+import logging
+from src.image_processor import preprocess_image, cleanup_images
+from src.ocr_handler import (
+    extract_text, extract_text_batch, build_tesseract_config, save_ocr_profile, load_ocr_profile, MONTAGE_PSMS
+)
+
+# Setup basic configuration for logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+# Candidate values benchmarked by the autotuner. OEM 0 is the legacy engine and OEM 1 the LSTM
+# engine; the default OEM 3 runs the LSTM engine as well, so it is not tried separately.
+# LSTM-only tessdata such as tessdata_fast or tessdata_best cannot run OEM 0: extract_text
+# returns no text, the profile scores a CER of 1.0 and is rejected.
+PSM_CANDIDATES = (3, 6, 11)
+OEM_CANDIDATES = (0, 1)
+BLUR_KSIZE_CANDIDATES = (1, 3, 5)
+BLOCK_SIZE_CANDIDATES = (11, 21, 31)
+
+
+def load_labeled_samples(samples_dir):
+    """
+    Collects labeled images from a directory. Each image must have a sibling .txt file
+    with the same name holding its expected text.
+
+    Parameters:
+        samples_dir (str): The directory containing the labeled images.
+
+    Returns:
+        list of tuples: (image_path, expected_text) pairs.
+    """
+    samples = []
+    for filename in sorted(os.listdir(samples_dir)):
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() not in IMAGE_EXTENSIONS or stem.endswith('_processed'):
+            continue
+        label_path = os.path.join(samples_dir, stem + '.txt')
+        if not os.path.isfile(label_path):
+            logging.warning(f"Skipping {filename}: no label file {label_path}")
+            continue
+        with open(label_path, 'r', encoding='utf-8') as f:
+            samples.append((os.path.join(samples_dir, filename), f.read().strip()))
+    return samples
+
+
+def character_error_rate(expected, actual):
+    """
+    Calculates the character error rate as the Levenshtein distance between the texts
+    divided by the length of the expected text. Whitespace runs are collapsed first.
+    """
+    expected = ' '.join(expected.split())
+    actual = ' '.join(actual.split())
+    if not expected:
+        return 0.0 if not actual else 1.0
+
+    previous_row = list(range(len(actual) + 1))
+    for i, expected_char in enumerate(expected, 1):
+        current_row = [i]
+        for j, actual_char in enumerate(actual, 1):
+            current_row.append(min(
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                previous_row[j - 1] + (expected_char != actual_char)
+            ))
+        previous_row = current_row
+    return previous_row[-1] / len(expected)
+
+
+def candidate_profiles(tessdata_dirs, languages):
+    """ Yields every combination of the candidate values for each tessdata directory. """
+    for tessdata_dir, psm, oem, blur_ksize, block_size in itertools.product(
+            tessdata_dirs, PSM_CANDIDATES, OEM_CANDIDATES, BLUR_KSIZE_CANDIDATES, BLOCK_SIZE_CANDIDATES):
+        yield {
+            'languages': languages,
+            'psm': psm,
+            'oem': oem,
+            'tessdata_dir': tessdata_dir,
+            'blur_ksize': blur_ksize,
+            'block_size': block_size,
+        }
+
+
+def run_profile(profile, samples):
+    """
+    Runs preprocessing and OCR with a profile over every sample once.
+
+    Returns:
+        tuple: (seconds per image, mean character error rate)
+    """
+    tesseract_config = build_tesseract_config(profile)
+    total_time = 0.0
+    total_cer = 0.0
+    for image_path, expected_text in samples:
+        start = time.perf_counter()
+        processed_image_path = preprocess_image(image_path, profile['blur_ksize'], profile['block_size'])
+        text = extract_text(processed_image_path, profile['languages'], tesseract_config) if processed_image_path else ""
+        total_time += time.perf_counter() - start
+        total_cer += character_error_rate(expected_text, text)
+        if processed_image_path:
+            cleanup_images(processed_image_path)
+    return total_time / len(samples), total_cer / len(samples)
+
+
+def benchmark_profile(profile, samples, repeats=3):
+    """
+    Times a profile over several runs of the sample set. The fastest run is reported so that
+    scheduling and cache noise does not decide between profiles that differ by milliseconds.
+
+    Returns:
+        tuple: (seconds per image, mean character error rate)
+    """
+    timings = []
+    cer = 0.0
+    for _ in range(max(repeats, 1)):
+        seconds_per_image, cer = run_profile(profile, samples)
+        timings.append(seconds_per_image)
+    return min(timings), cer
+
+
+def autotune(samples_dir, max_cer=0.05, languages='eng+heb+ara+rus', tessdata_dirs=('',), repeats=3):
+    """
+    Benchmarks every candidate profile on a labeled sample set and picks the fastest one
+    whose mean character error rate does not exceed max_cer.
+
+    Parameters:
+        samples_dir (str): The directory containing the labeled images.
+        max_cer (float): The accuracy target as a maximum character error rate.
+        languages (str): The Tesseract languages to benchmark with.
+        tessdata_dirs (iterable of str): Tessdata directories to compare, '' meaning the installed one.
+        repeats (int): How many timed runs of the sample set each profile gets.
+
+    Returns:
+        dict: The selected profile, or None if no profile meets the target.
+    """
+    samples = load_labeled_samples(samples_dir)
+    if not samples:
+        logging.error(f"No labeled samples found in {samples_dir}")
+        return None
+
+    best_profile, best_time = None, None
+    warmed_up = set()
+    for profile in candidate_profiles(tessdata_dirs, languages):
+        engine = (profile['tessdata_dir'], profile['oem'])
+        if engine not in warmed_up:
+            # Untimed pass so the first profile of each tessdata directory and engine does not
+            # pay for loading the model and filling the file cache
+            run_profile(profile, samples)
+            warmed_up.add(engine)
+        seconds_per_image, cer = benchmark_profile(profile, samples, repeats)
+        logging.info(f"Profile {profile}: {seconds_per_image:.3f}s per image, CER {cer:.4f}")
+        if cer <= max_cer and (best_time is None or seconds_per_image < best_time):
+            best_profile, best_time = profile, seconds_per_image
+
+    if best_profile is None:
+        logging.error(f"No profile reached a character error rate of {max_cer} or lower.")
+    else:
+        logging.info(f"Selected profile {best_profile} at {best_time:.3f}s per image")
+    return best_profile
+
+
+def benchmark_montage(samples_dir, profile, repeats=3):
+    """
+    Compares OCR throughput and accuracy of one Tesseract call per image against montage
+    batching, using a profile on a labeled sample set of small images. Images are preprocessed
+    once up front so only the OCR step is timed.
+
+    Parameters:
+        samples_dir (str): The directory containing the labeled images.
+        profile (dict): The OCR profile to benchmark with.
+        repeats (int): How many timed runs each mode gets; the fastest run counts.
+
+    Returns:
+        dict: Images per second and mean character error rate for each mode, or None if
+        there are no samples.
+    """
+    samples = load_labeled_samples(samples_dir)
+    if not samples:
+        logging.error(f"No labeled samples found in {samples_dir}")
+        return None
+    # Match the listener, which only builds montages for page segmentation modes that can read them
+    montage = profile['psm'] in MONTAGE_PSMS
+    if not montage:
+        logging.warning(f"PSM {profile['psm']} is not used for montages; the listener and this benchmark "
+                        f"fall back to single images, so no speed-up is expected.")
+
+    processed = [(preprocess_image(image_path, profile['blur_ksize'], profile['block_size']), expected_text)
+                 for image_path, expected_text in samples]
+    processed = [(path, expected_text) for path, expected_text in processed if path]
+    if not processed:
+        logging.error(f"None of the samples in {samples_dir} could be preprocessed")
+        return None
+    paths = [path for path, _ in processed]
+    tesseract_config = build_tesseract_config(profile)
+
+    def run_single():
+        return [extract_text(path, profile['languages'], tesseract_config) for path in paths]
+
+    def run_montage():
+        return extract_text_batch(paths, profile['languages'], tesseract_config, montage)
+
+    results = {}
+    try:
+        for mode, run in (('single', run_single), ('montage', run_montage)):
+            texts = run()  # Untimed warm-up pass
+            timings = []
+            for _ in range(max(repeats, 1)):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            cer = sum(character_error_rate(expected_text, text)
+                      for (_, expected_text), text in zip(processed, texts)) / len(processed)
+            results[mode] = {'images_per_second': len(paths) / min(timings), 'cer': cer}
+            logging.info(f"{mode}: {results[mode]['images_per_second']:.1f} images/s, CER {cer:.4f}")
+    finally:
+        cleanup_images(*paths)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tesseract profiles on a labeled image set and save the fastest accurate one.")
+    parser.add_argument('samples_dir', help="Directory of images, each with a same-named .txt file holding its expected text.")
+    parser.add_argument('--chat', type=int, default=None, help="Chat ID to save the profile for. Saves the default profile if omitted.")
+    parser.add_argument('--max-cer', type=float, default=0.05, help="Maximum acceptable character error rate (default: 0.05).")
+    parser.add_argument('--languages', default='eng+heb+ara+rus', help="Tesseract languages to benchmark with.")
+    parser.add_argument('--tessdata-dir', action='append', default=None,
+                        help="Tessdata directory to compare, e.g. tessdata_fast or tessdata_best. May be repeated.")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs of the sample set per profile (default: 3).")
+    parser.add_argument('--benchmark-montage', action='store_true',
+                        help="Instead of tuning, compare single-image and montage OCR throughput with the saved profile.")
+    args = parser.parse_args()
+
+    if args.benchmark_montage:
+        results = benchmark_montage(args.samples_dir, load_ocr_profile(args.chat), args.repeats)
+        if results:
+            for mode, result in results.items():
+                print(f"{mode}: {result['images_per_second']:.1f} images/s, CER {result['cer']:.4f}")
+            print(f"Speed-up: {results['montage']['images_per_second'] / results['single']['images_per_second']:.1f}x")
+        return
+
+    tessdata_dirs = args.tessdata_dir or ['']
+    profile = autotune(args.samples_dir, args.max_cer, args.languages, tessdata_dirs, args.repeats)
+    if profile is None:
+        print("No profile met the accuracy target; nothing was saved.")
+        return
+    save_ocr_profile(profile, args.chat)
+    print(f"Saved profile for {'chat ' + str(args.chat) if args.chat is not None else 'all chats'}: {profile}")
+
+
+if __name__ == '__main__':
+    main()
@@ -55,16 +55,27 @@ def enhance_sharpness(image, factor):
     enhancer = ImageEnhance.Sharpness(image)
     return enhancer.enhance(factor)
 
-def preprocess_image(image_path):
-    """ Apply preprocessing to improve OCR accuracy """
+def preprocess_image(image_path, blur_ksize=5, block_size=11):
+    """
+    Apply preprocessing to improve OCR accuracy.
+
+    Parameters:
+        image_path (str): The path to the image to preprocess.
+        blur_ksize (int): Odd aperture size for the median blur; 1 disables blurring.
+        block_size (int): Odd neighbourhood size for the adaptive threshold.
+
+    Returns:
+        str: The path to the processed image or None if the image could not be loaded.
+    """
     img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
     if img is None:
         logging.error(f"Failed to load image {image_path}")
         return None
 
     # Apply a series of preprocessing techniques
-    img = cv2.medianBlur(img, 5)
-    img = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    if blur_ksize > 1:
+        img = cv2.medianBlur(img, blur_ksize)
+    img = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, 2)
     kernel = np.ones((1, 1), np.uint8)
     img = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel)
 
@@ -74,6 +85,80 @@ def preprocess_image(image_path):
     return processed_image_path
 
 
+def build_montage(image_paths, page_width=2400, gutter=60):
+    """
+    Packs images into rows of a single white grayscale page so they can be OCR'd in one call.
+
+    Parameters:
+        image_paths (list of str): The images to pack, typically small preprocessed images.
+        page_width (int): The width of the page; wider images get a row of their own.
+        gutter (int): The blank space kept around every tile so text from neighbouring tiles is not joined.
+
+    Returns:
+        tuple: The page as a PIL image and a list with each image's (left, top, right, bottom)
+        box on the page, or None for images that could not be loaded.
+    """
+    tiles = []
+    for image_path in image_paths:
+        try:
+            with Image.open(image_path) as img:
+                tiles.append(img.convert('L'))
+        except Exception as e:
+            logger.error(f"Failed to load image {image_path} for montage: {e}")
+            tiles.append(None)
+
+    # Lay the tiles out row by row, starting a new row when the current one is full
+    boxes = []
+    x, y, row_height, used_width = gutter, gutter, 0, 0
+    for tile in tiles:
+        if tile is None:
+            boxes.append(None)
+            continue
+        width, height = tile.size
+        if x > gutter and x + width + gutter > page_width:
+            x, y, row_height = gutter, y + row_height + gutter, 0
+        boxes.append((x, y, x + width, y + height))
+        x += width + gutter
+        row_height = max(row_height, height)
+        used_width = max(used_width, x)
+
+    page = Image.new('L', (max(used_width, 2 * gutter), y + row_height + gutter), 255)
+    for tile, box in zip(tiles, boxes):
+        if tile is not None:
+            page.paste(tile, box[:2])
+    return page, boxes
+
+
+def split_montage_text(data, boxes):
+    """
+    Maps the words Tesseract found on a montage page back to the tiles they came from.
+    Words overlapping more than one tile, or none, are dropped so text is never mixed between images.
+
+    Parameters:
+        data (dict): The output of pytesseract.image_to_data with output_type=Output.DICT.
+        boxes (list): The tile boxes returned by build_montage.
+
+    Returns:
+        list of str: The text of each tile, one line per Tesseract line, in the order of boxes.
+    """
+    tile_lines = [{} for _ in boxes]
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        left, top = data['left'][i], data['top'][i]
+        right, bottom = left + data['width'][i], top + data['height'][i]
+        owners = [
+            idx for idx, box in enumerate(boxes)
+            if box and left < box[2] and right > box[0] and top < box[3] and bottom > box[1]
+        ]
+        if len(owners) != 1:
+            logger.info(f"Dropping montage word '{word}' at {(left, top, right, bottom)} overlapping tiles {owners}")
+            continue
+        line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        tile_lines[owners[0]].setdefault(line_key, []).append(word)
+    return ['\n'.join(' '.join(words) for words in lines.values()) for lines in tile_lines]
+
+
 async def process_image_for_ocr(image_path):
     """ Asynchronously process an image for better OCR results using multiple filters. """
     try:
@@ -6,6 +6,7 @@ import sys
 import logging
 import configparser
 import platform
+from src.image_processor import build_montage, split_montage_text
 
 # Setup basic configuration for logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
@@ -58,6 +59,120 @@ def save_tesseract_path(path):
     with open(CONFIG_FILE_PATH, 'w') as configfile:
         config.write(configfile)
 
+# Images whose longest side is at most this many pixels are OCR'd together in montages
+SMALL_IMAGE_MAX_SIDE = 400
+MONTAGE_MAX_TILES = 48
+# Page segmentation modes that find several text blocks on a page and can read a montage
+MONTAGE_PSMS = (3, 11)
+
+DEFAULT_OCR_PROFILE = {
+    'languages': 'eng+heb+ara+rus',
+    'psm': 3,
+    'oem': 3,
+    'tessdata_dir': '',
+    'blur_ksize': 5,
+    'block_size': 11,
+}
+
+
+def _profile_section(chat_id=None):
+    return f"OCRProfile {chat_id}" if chat_id is not None else "OCRProfile"
+
+
+def save_ocr_profile(profile, chat_id=None):
+    """
+    Saves an OCR profile to the configuration file, either as the default or for a single chat.
+
+    Parameters:
+        profile (dict): The profile to save, using the keys of DEFAULT_OCR_PROFILE.
+        chat_id (int): The chat the profile applies to, or None to save it as the default.
+    """
+    profile_config = configparser.ConfigParser()
+    profile_config.read(CONFIG_FILE_PATH)
+    profile_config[_profile_section(chat_id)] = {key: str(profile.get(key, value)) for key, value in DEFAULT_OCR_PROFILE.items()}
+    with open(CONFIG_FILE_PATH, 'w') as configfile:
+        profile_config.write(configfile)
+    logging.info(f"Saved OCR profile {profile} to section [{_profile_section(chat_id)}]")
+
+
+def load_ocr_profiles():
+    """
+    Reads every saved OCR profile from the configuration file. Callers should load the
+    profiles once per run and pick from them with select_ocr_profile, rather than re-reading
+    the file for each image.
+
+    Returns:
+        dict: The profiles keyed by chat ID, with the default profile under None.
+    """
+    profile_config = configparser.ConfigParser()
+    profile_config.read(CONFIG_FILE_PATH)
+    profiles = {}
+    for section in profile_config.sections():
+        if section == _profile_section():
+            chat_id = None
+        elif section.startswith(_profile_section() + ' '):
+            try:
+                chat_id = int(section.split(' ', 1)[1])
+            except ValueError:
+                logging.warning(f"Ignoring OCR profile section with an invalid chat ID: [{section}]")
+                continue
+        else:
+            continue
+        stored = profile_config[section]
+        profiles[chat_id] = {
+            'languages': stored.get('languages', DEFAULT_OCR_PROFILE['languages']),
+            'psm': stored.getint('psm', DEFAULT_OCR_PROFILE['psm']),
+            'oem': stored.getint('oem', DEFAULT_OCR_PROFILE['oem']),
+            'tessdata_dir': stored.get('tessdata_dir', DEFAULT_OCR_PROFILE['tessdata_dir']),
+            'blur_ksize': stored.getint('blur_ksize', DEFAULT_OCR_PROFILE['blur_ksize']),
+            'block_size': stored.getint('block_size', DEFAULT_OCR_PROFILE['block_size']),
+        }
+    return profiles
+
+
+def select_ocr_profile(profiles, chat_id=None):
+    """
+    Picks the OCR profile for a chat, falling back to the saved default and then to DEFAULT_OCR_PROFILE.
+
+    Parameters:
+        profiles (dict): The profiles as returned by load_ocr_profiles.
+        chat_id (int): The chat whose profile should be used, or None for the default.
+
+    Returns:
+        dict: The OCR profile.
+    """
+    return profiles.get(chat_id) or profiles.get(None) or dict(DEFAULT_OCR_PROFILE)
+
+
+def load_ocr_profile(chat_id=None):
+    """
+    Loads the OCR profile for a single chat straight from the configuration file.
+
+    Parameters:
+        chat_id (int): The chat whose profile should be loaded, or None for the default.
+
+    Returns:
+        dict: The OCR profile.
+    """
+    return select_ocr_profile(load_ocr_profiles(), chat_id)
+
+
+def build_tesseract_config(profile):
+    """
+    Builds the Tesseract command-line options for an OCR profile.
+
+    Parameters:
+        profile (dict): The OCR profile.
+
+    Returns:
+        str: The options to pass as pytesseract's config argument.
+    """
+    options = f"--psm {profile['psm']} --oem {profile['oem']}"
+    if profile.get('tessdata_dir'):
+        options += f' --tessdata-dir "{profile["tessdata_dir"]}"'
+    return options
+
+
 def install_tesseract():
     """
     Attempts to install Tesseract OCR based on the operating system.
@@ -95,13 +210,14 @@ tesseract_path = check_tesseract_installed()
 if tesseract_path != "tesseract":
     pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
-def extract_text(image_path, languages='eng+heb+ara+rus'):
+def extract_text(image_path, languages='eng+heb+ara+rus', tesseract_config=''):
     """
     Extracts text from an image using OCR, supporting multiple languages.
 
     Parameters:
         image_path (str): The path to the image from which to extract text.
         languages (str): The languages to use for OCR, formatted as Tesseract language codes separated by '+'.
+        tesseract_config (str): Extra Tesseract options, e.g. as returned by build_tesseract_config.
 
     Returns:
         str: The extracted text, stripped of leading and trailing whitespace.
@@ -109,7 +225,7 @@ def extract_text(image_path, languages='eng+heb+ara+rus'):
     try:
         with Image.open(image_path) as img:
             logging.info(f"Starting OCR processing for {image_path}")
-            text = pytesseract.image_to_string(img, lang=languages)
+            text = pytesseract.image_to_string(img, lang=languages, config=tesseract_config)
             cleaned_text = text.strip()
             logging.info(f"OCR processing completed for {image_path}")
             return cleaned_text
@@ -120,3 +236,49 @@ def extract_text(image_path, languages='eng+heb+ara+rus'):
         logging.error(f"OCR processing error for {image_path}: {e}")
         return ""
 
+
+def extract_text_batch(image_paths, languages='eng+heb+ara+rus', tesseract_config='', montage=True):
+    """
+    Extracts text from many images, packing the small ones into montage pages so each page
+    costs a single Tesseract call. Larger images are processed one by one with extract_text.
+
+    Parameters:
+        image_paths (list of str): The paths to the images from which to extract text.
+        languages (str): The languages to use for OCR, formatted as Tesseract language codes separated by '+'.
+        tesseract_config (str): Extra Tesseract options.
+        montage (bool): Whether small images may share a page. Pass False unless the page
+            segmentation mode finds multiple blocks per page (one of MONTAGE_PSMS); otherwise
+            every image is processed with extract_text.
+
+    Returns:
+        list of str: The extracted text for each image, in the same order as image_paths.
+    """
+    texts = [""] * len(image_paths)
+    small_indices = []
+    for idx, image_path in enumerate(image_paths):
+        try:
+            with Image.open(image_path) as img:
+                is_small = montage and max(img.size) <= SMALL_IMAGE_MAX_SIDE
+        except Exception as e:
+            logging.error(f"Could not open the image at {image_path}: {e}")
+            continue
+        if is_small:
+            small_indices.append(idx)
+        else:
+            texts[idx] = extract_text(image_path, languages, tesseract_config)
+
+    for start in range(0, len(small_indices), MONTAGE_MAX_TILES):
+        chunk = small_indices[start:start + MONTAGE_MAX_TILES]
+        try:
+            page, boxes = build_montage([image_paths[idx] for idx in chunk])
+            logging.info(f"Starting OCR processing for a montage of {len(chunk)} images")
+            data = pytesseract.image_to_data(page, lang=languages, config=tesseract_config,
+                                             output_type=pytesseract.Output.DICT)
+            for idx, text in zip(chunk, split_montage_text(data, boxes)):
+                texts[idx] = text.strip()
+            logging.info(f"OCR processing completed for a montage of {len(chunk)} images")
+        except Exception as e:  # General exception to catch any error from pytesseract
+            logging.error(f"OCR processing error for montage, falling back to single images: {e}")
+            for idx in chunk:
+                texts[idx] = extract_text(image_paths[idx], languages, tesseract_config)
+    return texts
@@ -5,8 +5,11 @@ import re
 from difflib import SequenceMatcher
 from telethon import TelegramClient, events
 from telethon.tl.types import PhotoSize
-from src.image_processor import process_image_for_ocr, IMAGES_DIR, clean_up_image, preprocess_image
-from src.ocr_handler import extract_text, check_tesseract_installed, install_tesseract
+from src.image_processor import IMAGES_DIR, clean_up_image, preprocess_image
+from src.ocr_handler import (
+    extract_text, extract_text_batch, check_tesseract_installed, install_tesseract, load_ocr_profiles,
+    select_ocr_profile, build_tesseract_config, MONTAGE_PSMS
+)
 from src.utilities import (
     generate_message_shortcut, get_or_request_credentials,
     compile_keywords_pattern, export_message_data, parse_group_input, get_list_of_recent_chats
@@ -73,77 +76,153 @@ def calculate_similarity(text, keyword, threshold=0.8):
 
 
 
-async def data_analysis(client, group_input, keywords, mode):
+async def data_analysis(client, group_input, keywords, mode, batch=False):
     chat_id = parse_group_input(group_input) if group_input else None
     pattern = compile_keywords_pattern(keywords) if keywords else None
+    # Read the autotuned profiles once for the whole run instead of once per image
+    profiles = load_ocr_profiles()
     try:
         if chat_id:
             chat = await client.get_entity(chat_id)
             messages = await client.get_messages(chat, limit=100) if mode == 'h' else client.iter_messages(chat)
-            for message in messages:
-                await process_and_export_message(client, message, keywords, pattern)
+            if batch and mode == 'h':
+                await process_and_export_messages_batch(client, messages, keywords, pattern, profiles)
+            else:
+                for message in messages:
+                    await process_and_export_message(client, message, keywords, pattern, profiles)
         else:
             chats = await get_list_of_recent_chats(client)
             for chat in chats:
                 messages = await client.get_messages(chat.id, limit=100) if mode == 'h' else client.iter_messages(chat.id)
-                for message in messages:
-                    await process_and_export_message(client, message, keywords, pattern)
+                if batch and mode == 'h':
+                    await process_and_export_messages_batch(client, messages, keywords, pattern, profiles)
+                else:
+                    for message in messages:
+                        await process_and_export_message(client, message, keywords, pattern, profiles)
     except Exception as e:
         logging.error(f"An error occurred during data analysis: {str(e)}")
 
-# Assuming preprocess_image and process_image_for_ocr are synchronous functions:
-async def process_and_export_message(client, message, keywords, pattern):
+async def download_largest_photo(client, message):
+    """ Downloads the largest size of a message's photo and returns its path, or None on failure. """
+    valid_sizes = [size for size in message.photo.sizes if isinstance(size, PhotoSize)]
+    if not valid_sizes:
+        logging.error("No valid photo sizes available.")
+        return None
+
+    largest_photo = max(valid_sizes, key=lambda size: size.size)
+    file_path = await client.download_media(message.media, file=os.path.join(IMAGES_DIR,
+                                                                             f"{message.id}_{largest_photo.type}.jpg"))
+    if not file_path:
+        logging.error(f"Failed to download image for message {message.id}.")
+    return file_path
+
+
+async def export_if_matching(message, extracted_text, processed_image_path, keywords):
+    """
+    Exports the message if the extracted text matches a keyword, otherwise removes the processed image.
+
+    Returns:
+        bool: True if a match was found and exported.
+    """
+    found_match = False  # Flag to determine if a match was found
+    if extracted_text:
+        for keyword in keywords:
+            similarity = calculate_similarity(extracted_text, keyword)
+            if similarity > 0:
+                found_match = True
+                message_data = {
+                    'Message Time': str(message.date),
+                    'Sender ID': message.sender_id,
+                    'Text': extracted_text,
+                    'Message ID': message.id,
+                    'Chat ID': message.chat_id,
+                    'Message Link': generate_message_shortcut(message),
+                    'Local Image Path': processed_image_path,
+                    'Accuracy': f"{similarity * 100:.2f}%"
+                }
+                await export_message_data(message_data, export_format='json')
+                break  # Stop after the first match
+
+        if not found_match:
+            # If no match is found, then remove the image
+            await clean_up_image(processed_image_path)
+            logging.info(
+                f"Image removed due to insufficient text or keyword match: {processed_image_path}")
+    else:
+        logging.info("No text extracted from image.")
+        await clean_up_image(processed_image_path)
+    return found_match
+
+
+async def process_and_export_message(client, message, keywords, pattern, profiles):
     if hasattr(message, 'photo') and message.photo:
+        file_path = None
         try:
-            valid_sizes = [size for size in message.photo.sizes if isinstance(size, PhotoSize)]
-            if not valid_sizes:
-                logging.error("No valid photo sizes available.")
-                return
-
-            largest_photo = max(valid_sizes, key=lambda size: size.size)
-            file_path = await client.download_media(message.media, file=os.path.join(IMAGES_DIR,
-                                                                                     f"{message.id}_{largest_photo.type}.jpg"))
+            file_path = await download_largest_photo(client, message)
             if file_path:
-                processed_image_path = await process_image_for_ocr(file_path)
+                found_match = False
+                # Use the chat's autotuned profile, or the default one if none was saved
+                profile = select_ocr_profile(profiles, message.chat_id)
+                processed_image_path = preprocess_image(file_path, profile['blur_ksize'], profile['block_size'])
                 if processed_image_path:
-                    extracted_text = extract_text(processed_image_path)
-                    found_match = False  # Flag to determine if a match was found
-                    if extracted_text:
-                        for keyword in keywords:
-                            similarity = calculate_similarity(extracted_text, keyword)
-                            if similarity > 0:
-                                found_match = True
-                                message_data = {
-                                    'Message Time': str(message.date),
-                                    'Sender ID': message.sender_id,
-                                    'Text': extracted_text,
-                                    'Message ID': message.id,
-                                    'Chat ID': message.chat_id,
-                                    'Message Link': generate_message_shortcut(message),
-                                    'Local Image Path': processed_image_path,
-                                    'Accuracy': f"{similarity * 100:.2f}%"
-                                }
-                                await export_message_data(message_data, export_format='json')
-                                break  # Stop after the first match
-
-                        if not found_match:
-                            # If no match is found, then remove the image
-                            await clean_up_image(processed_image_path)
-                            logging.info(
-                                f"Image removed due to insufficient text or keyword match: {processed_image_path}")
-                    else:
-                        logging.info("No text extracted from image.")
-                        await clean_up_image(processed_image_path)
+                    extracted_text = extract_text(processed_image_path, profile['languages'], build_tesseract_config(profile))
+                    found_match = await export_if_matching(message, extracted_text, processed_image_path, keywords)
                 else:
                     logging.error("Failed to process image for OCR.")
                 if not found_match:
                     # Clean up original image if no match was found
                     await clean_up_image(file_path)
+        except Exception as e:
+            logging.error(f"Failed to process image from message {message.id} due to error: {e}")
+            if file_path:
+                await clean_up_image(file_path)  # Ensure cleanup even on failure
+
+
+async def process_and_export_messages_batch(client, messages, keywords, pattern, profiles):
+    """
+    Processes the photos of many messages together. Small images are OCR'd in shared montage
+    pages, which saves the per-call Tesseract overhead that dominates for stickers and thumbnails.
+    """
+    # Download and preprocess every photo first, grouping them by the OCR options they need
+    batches = {}
+    for message in messages:
+        if not (hasattr(message, 'photo') and message.photo):
+            continue
+        file_path = None
+        try:
+            file_path = await download_largest_photo(client, message)
+            if not file_path:
+                continue
+            profile = select_ocr_profile(profiles, message.chat_id)
+            processed_image_path = preprocess_image(file_path, profile['blur_ksize'], profile['block_size'])
+            if processed_image_path:
+                batch_key = (profile['languages'], build_tesseract_config(profile), profile['psm'] in MONTAGE_PSMS)
+                batches.setdefault(batch_key, []).append(
+                    (message, file_path, processed_image_path))
             else:
-                logging.error(f"Failed to download image for message {message.id}.")
+                logging.error("Failed to process image for OCR.")
+                await clean_up_image(file_path)
         except Exception as e:
             logging.error(f"Failed to process image from message {message.id} due to error: {e}")
-            await clean_up_image(file_path)  # Ensure cleanup even on failure
+            if file_path:
+                await clean_up_image(file_path)
+
+    for (languages, tesseract_config, montage), entries in batches.items():
+        try:
+            extracted_texts = extract_text_batch([entry[2] for entry in entries], languages, tesseract_config, montage)
+        except Exception as e:
+            logging.error(f"Failed to extract text for a batch of {len(entries)} images due to error: {e}")
+            for message, file_path, processed_image_path in entries:
+                await clean_up_image(processed_image_path, file_path)
+            continue
+        for (message, file_path, processed_image_path), extracted_text in zip(entries, extracted_texts):
+            try:
+                if not await export_if_matching(message, extracted_text, processed_image_path, keywords):
+                    # Clean up original image if no match was found
+                    await clean_up_image(file_path)
+            except Exception as e:
+                logging.error(f"Failed to export message {message.id} due to error: {e}")
+                await clean_up_image(processed_image_path, file_path)
 
 
 async def main():
@@ -162,11 +241,12 @@ async def main():
         if mode in ['h', 'r']:
             group_input = input("Enter the Group ID or Link to scan: ")
             keywords = input("Enter keywords to filter by (comma-separated): ").split(',')
+            batch = mode == 'h' and input("Batch small images into shared OCR pages? (y/n): ").lower() == 'y'
             print("Activity is logged, please check telegram_ocr.log for details.")
             print("Check export.json for exported message details.")
             if mode == 'r':
                 print("Client Started. Listening for incoming messages...")
-            await data_analysis(client, group_input, keywords, mode)
+            await data_analysis(client, group_input, keywords, mode, batch)
             break
         else:
             logging.error("Invalid mode selected. Please choose either 'Historical (h)' or 'Real-Time (r)'.")
@@ -1,26 +1,27 @@
 import re
 import logging
-from src.image_processor import process_image_for_ocr, clean_up_image
-from src.ocr_handler import extract_text
+from src.image_processor import preprocess_image, clean_up_image
+from src.ocr_handler import extract_text, select_ocr_profile, build_tesseract_config
 from src.utilities import export_message_data, generate_message_shortcut
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-async def process_message_photo(message):
+async def process_message_photo(message, profile):
     """
     Downloads and processes a photo attached to a message, then extracts text.
 
     Parameters:
         message (Message): The Telegram message object containing a photo.
+        profile (dict): The OCR profile whose preprocessing parameters are applied.
 
     Returns:
         str: The path to the processed image or None if processing fails.
     """
     try:
         img_path = await message.download_media()
-        processed_image_path = process_image_for_ocr(img_path)
+        processed_image_path = preprocess_image(img_path, profile['blur_ksize'], profile['block_size'])
         return processed_image_path
     except Exception as e:
         logging.error(f"Error processing photo in message {message.id}: {e}")
@@ -63,18 +64,20 @@ def construct_message_data(message, extracted_text):
     }
     return message_data
 
-async def handle_message(message, pattern):
+async def handle_message(message, pattern, profiles):
     """
     Process, extract, and optionally export data from a message containing a photo.
 
     Parameters:
         message (Message): The Telegram message to process.
         pattern (re.Pattern): The compiled regex pattern to filter extracted text.
+        profiles (dict): The OCR profiles as returned by load_ocr_profiles.
     """
     try:
-        processed_image_path = await process_message_photo(message)
+        profile = select_ocr_profile(profiles, message.chat_id)
+        processed_image_path = await process_message_photo(message, profile)
         if processed_image_path:
-            extracted_text = extract_text(processed_image_path)
+            extracted_text = extract_text(processed_image_path, profile['languages'], build_tesseract_config(profile))
             if extracted_text:
                 if search_keywords_in_text(extracted_text, pattern):
                     message_data = construct_message_data(message, extracted_text)
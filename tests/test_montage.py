@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+from src.image_processor import build_montage, split_montage_text
+
+
+def make_data(words):
+    """ Builds a pytesseract image_to_data dict from (text, left, top, width, height, block, par, line) tuples. """
+    keys = ('text', 'left', 'top', 'width', 'height', 'block_num', 'par_num', 'line_num')
+    return {key: [word[idx] for word in words] for idx, key in enumerate(keys)}
+
+
+class SplitMontageTextTests(unittest.TestCase):
+    # Two tiles on the same row, 60 px apart, and a second row with one tile
+    BOXES = [(60, 60, 160, 100), (220, 60, 320, 100), None, (60, 160, 160, 200)]
+
+    def test_word_inside_one_tile(self):
+        data = make_data([('hello', 65, 65, 40, 20, 1, 1, 1)])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['hello', '', '', ''])
+
+    def test_word_overlapping_two_tiles_is_dropped(self):
+        data = make_data([
+            ('left', 65, 65, 30, 20, 1, 1, 1),
+            ('bridge', 150, 65, 80, 20, 1, 1, 1),
+            ('right', 230, 65, 30, 20, 1, 1, 1),
+        ])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['left', 'right', '', ''])
+
+    def test_word_in_gutter_is_dropped(self):
+        data = make_data([('noise', 170, 65, 40, 20, 1, 1, 1), ('edge', 0, 0, 50, 50, 1, 1, 1)])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['', '', '', ''])
+
+    def test_missing_box_gets_no_text(self):
+        data = make_data([('below', 65, 165, 40, 20, 2, 1, 1)])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['', '', '', 'below'])
+
+    def test_empty_words_are_ignored(self):
+        data = make_data([('', 65, 65, 40, 20, 1, 1, 1), ('  ', 225, 65, 40, 20, 1, 1, 1)])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['', '', '', ''])
+
+    def test_line_spanning_tiles_on_same_row_is_split(self):
+        # Tesseract may read words from neighbouring tiles as one line; each tile keeps only its own
+        data = make_data([
+            ('one', 65, 65, 30, 15, 1, 1, 1),
+            ('two', 100, 65, 30, 15, 1, 1, 1),
+            ('three', 225, 65, 40, 15, 1, 1, 1),
+            ('four', 65, 82, 30, 15, 1, 1, 2),
+            ('five', 225, 82, 30, 15, 1, 1, 2),
+        ])
+        self.assertEqual(split_montage_text(data, self.BOXES), ['one two\nfour', 'three\nfive', '', ''])
+
+
+class BuildMontageTests(unittest.TestCase):
+    SIZES = [(100, 50), (300, 200), (2600, 100), (400, 400), (37, 91), (1200, 30)] * 4
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for idx, size in enumerate(self.SIZES):
+            path = os.path.join(self.tmp_dir, f"{idx}.png")
+            Image.new('L', size, idx % 200).save(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_boxes_match_image_sizes(self):
+        _, boxes = build_montage(self.paths)
+        self.assertEqual([(box[2] - box[0], box[3] - box[1]) for box in boxes], self.SIZES)
+
+    def test_boxes_keep_gutter_and_never_overlap(self):
+        gutter = 60
+        page, boxes = build_montage(self.paths, page_width=2400, gutter=gutter)
+        for box in boxes:
+            self.assertGreaterEqual(box[0], gutter)
+            self.assertGreaterEqual(box[1], gutter)
+            self.assertLessEqual(box[2] + gutter, page.size[0])
+            self.assertLessEqual(box[3] + gutter, page.size[1])
+        for idx, first in enumerate(boxes):
+            for second in boxes[idx + 1:]:
+                apart = (first[2] + gutter <= second[0] or second[2] + gutter <= first[0] or
+                         first[3] + gutter <= second[1] or second[3] + gutter <= first[1])
+                self.assertTrue(apart, f"{first} and {second} are closer than the {gutter} px gutter")
+
+    def test_tiles_are_pasted_at_their_boxes(self):
+        page, boxes = build_montage(self.paths)
+        for idx, box in enumerate(boxes):
+            self.assertEqual(page.getpixel(box[:2]), idx % 200)
+            self.assertEqual(page.getpixel((box[2] - 1, box[3] - 1)), idx % 200)
+            self.assertEqual(page.getpixel((box[0] - 1, box[1] - 1)), 255)
+
+    def test_unreadable_image_gets_no_box(self):
+        paths = [self.paths[0], os.path.join(self.tmp_dir, 'missing.png'), self.paths[1]]
+        _, boxes = build_montage(paths)
+        self.assertIsNone(boxes[1])
+        self.assertIsNotNone(boxes[0])
+        self.assertIsNotNone(boxes[2])
+
+
+if __name__ == '__main__':
+    unittest.main()